@@ -0,0 +1,21 @@
+"""
+Ponto de entrada do backend: python -m backend
+
+A app eh importada de backend.app, o mesmo modulo que log_manager e log_monitor usam.
+`python backend/app.py` so redireciona para ca, sem montar uma segunda copia (app, db e models em __main__).
+"""
+import os
+
+from backend.app import app, db
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+    # debug (reloader + debugger) so quando pedido; threaded atende requisicoes em paralelo
+    debug = os.getenv('FLASK_DEBUG', 'False').lower() in ('1', 'true', 'yes')
+    app.run(debug=debug, threaded=True, host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,165 @@
 import os
+import time
+import base64
+import queue
+import socket
+import sqlite3
+import logging
+import operator
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, Response, g, request, jsonify, redirect
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
+from flask_caching import Cache
+from flask_compress import Compress
 from flask_restx import Api, Resource, fields
-from docker.errors import DockerException
+from jsonschema import Draft4Validator
+from sqlalchemy import delete, event, func, select, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.schema import DDL
+from sqlalchemy.orm import load_only, raiseload, undefer
+from sqlalchemy.types import DateTime, TypeDecorator, LargeBinary
 
 THIS_DIR = os.path.abspath(os.path.dirname(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(THIS_DIR, ".."))
 
+if __name__ == '__main__':
+    # `python backend/app.py` equivale a `python -m backend`; sai antes de montar app/listeners aqui,
+    # senao o corpo do modulo rodaria duas vezes (__main__ e backend.app)
+    import sys
+    import runpy
+    sys.path.insert(0, PROJECT_ROOT)
+    runpy.run_module('backend', run_name='__main__', alter_sys=True)
+    sys.exit()
+
 load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
 
 try:
     from docker_manager import create_node, is_port_free, remove_node, logger
 except Exception:
     try:
-        from backend.docker_manager import create_node, is_port_free, remove_node
+        from backend.docker_manager import create_node, is_port_free, remove_node, logger
     except Exception as e:
         raise ImportError(
             f"Nao foi possivel importar docker_manager: {e}\n"
             "Execute o backend via:\n"
-            "    python -m backend.app\n"
+            "    python -m backend\n"
             "ou ajuste PYTHONPATH."
         )
 
 
 
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify/app.json via orjson; tipos que o orjson nao conhece caem no default do Flask."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def json_response(payload, status=200):
+    """Resposta JSON serializada direto com orjson, sem passar pelo marshal do Flask-RESTX."""
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
 default_db = f"sqlite:///{os.path.join(PROJECT_ROOT, 'instance', 'beehive.db')}"
 
+
+def engine_options(database_uri):
+    """Pool dimensionado para os workers; SQLite em memoria usa StaticPool e nao aceita pool_size."""
+    options = {'pool_pre_ping': True, 'pool_recycle': 1800}
+    if database_uri not in ('sqlite://', 'sqlite:///:memory:'):
+        options['pool_size'] = int(os.getenv('DB_POOL_SIZE', 20))
+        options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', 40))
+    return options
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: leitores nao bloqueiam o escritor; synchronous=NORMAL basta com WAL
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        # SQLite so aplica FOREIGN KEY com o pragma ligado (por conexao)
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        # Cache de paginas por conexao: valor negativo = KiB (64 MiB), em vez das ~2 MiB padrao
+        cursor.execute('PRAGMA cache_size=-65536')
+        cursor.execute('PRAGMA mmap_size=268435456')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.close()
+
+
+perf_logger = logging.getLogger("beehive.perf")
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_start(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_end(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_start_time'].pop()) * 1000
+    if elapsed_ms > SLOW_QUERY_MS:
+        perf_logger.warning("SLOW QUERY %.1fms %s", elapsed_ms, statement)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', default_db)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+# Sem validacao de payload pelo RESTX (Model.validate); os handlers validam o que precisam
+app.config['RESTX_VALIDATE'] = os.getenv('RESTX_VALIDATE', 'False').lower() in ('1', 'true', 'yes')
+# 404 com a mensagem do handler (ex.: 'Honeypot not found'), sem as sugestoes de rota do RESTX
+app.config['ERROR_404_HELP'] = False
+# Cache de respostas GET: em memoria por padrao, Redis quando CACHE_REDIS_URL estiver definido
+app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'RedisCache' if app.config['CACHE_REDIS_URL'] else 'SimpleCache')
+app.config['CACHE_KEY_PREFIX'] = 'beehive:'
+
+# Compressao das respostas JSON (listas de logs repetem muito IP/event_type)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+
+# TTL (segundos) por endpoint; logs mudam mais rapido que honeypots
+LOGS_CACHE_TTL = 5
+HONEYPOTS_CACHE_TTL = 30
+
+# Validacao de honeypots
+HONEYPOT_TYPES = ('ssh', 'telnet', 'http')
+# Campos que GET /api/honeypots aceita em ?fields=
+HONEYPOT_FIELDS = ('id', 'name', 'type', 'host', 'port', 'status', 'created_at', 'logs_count')
+# Campos extras que GET /api/logs aceita em ?include= (vindos de JOIN)
+LOG_INCLUDES = ('honeypot_name',)
+
+# Criacao de containers fora da thread da requisicao (POST /api/honeypots responde 202)
+PROVISION_WORKERS = int(os.getenv('PROVISION_WORKERS', '4'))
+
+# Paginacao de /api/logs
+LOGS_DEFAULT_LIMIT = 100
+LOGS_MAX_LIMIT = 1000
+LOGS_ENCODE_BATCH = 500
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
-CORS(app)
+cache = Cache(app)
+provision_executor = ThreadPoolExecutor(max_workers=PROVISION_WORKERS, thread_name_prefix='provision')
+Compress(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'X-Process-Time-Ms'])
 
 # Initialize Flask-RESTX
 api = Api(
@@ -48,6 +171,80 @@ api = Api(
     prefix='/api'
 )
 
+
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    """Saida dos Resources (marshal_with, abort) via orjson em vez do json da stdlib."""
+    response = Response(orjson.dumps(data, default=app.json.default), status=code, mimetype='application/json')
+    response.headers.extend(headers or {})
+    return response
+
+
+# IPv4 vira IPv4-mapped IPv6 (::ffff:a.b.c.d) para caber no mesmo formato de 16 bytes
+_V4_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
+
+
+def pack_ip(value):
+    """Converte um endereco IPv4/IPv6 em 16 bytes. Levanta ValueError se for invalido."""
+    value = str(value).strip()
+    try:
+        return _V4_MAPPED_PREFIX + socket.inet_pton(socket.AF_INET, value)
+    except OSError:
+        pass
+    try:
+        return socket.inet_pton(socket.AF_INET6, value)
+    except OSError:
+        raise ValueError(f'Invalid IP address: {value}')
+
+
+def unpack_ip(value):
+    value = bytes(value)
+    if value[:12] == _V4_MAPPED_PREFIX:
+        return socket.inet_ntop(socket.AF_INET, value[12:])
+    return socket.inet_ntop(socket.AF_INET6, value)
+
+
+class PackedIP(TypeDecorator):
+    """IP armazenado como 16 bytes; a aplicacao continua vendo strings."""
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return pack_ip(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return unpack_ip(value) if value is not None else None
+
+
+class utcnow(FunctionElement):
+    """Horario UTC gerado pelo banco (default server-side das colunas de data)."""
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    # CURRENT_TIMESTAMP eh UTC no padrao SQL
+    return 'CURRENT_TIMESTAMP'
+
+
+@compiles(utcnow, 'sqlite')
+def _utcnow_sqlite(element, compiler, **kw):
+    # Mesmo formato texto que o DateTime do SQLAlchemy grava ('YYYY-MM-DD HH:MM:SS.ffffff'):
+    # com CURRENT_TIMESTAMP (sem fracao) a comparacao do cursor (timestamp, id) < (...) repetia linhas
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+@compiles(utcnow, 'postgresql')
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, 'mysql')
+def _utcnow_mysql(element, compiler, **kw):
+    return '(UTC_TIMESTAMP())'
+
+
 # Models
 class Honeypot(db.Model):
     __tablename__ = 'honeypots'
@@ -56,16 +253,41 @@ class Honeypot(db.Model):
     container_name = db.Column(db.String(128), nullable=True)
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    type = db.Column(db.String(20), nullable=False)  # ssh, telnet, http
+    # VARCHAR + CHECK (ssh, telnet, http) em qualquer banco
+    type = db.Column(
+        db.Enum(*HONEYPOT_TYPES, name='honeypot_type', native_enum=False, create_constraint=True, length=20),
+        nullable=False,
+    )
     host = db.Column(db.String(50), nullable=False, default='0.0.0.0')
     port = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), nullable=False, default='inactive')  # active, inactive
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=utcnow())
     
     # Relationship to logs
-    logs = db.relationship('Log', backref='honeypot', lazy=True, cascade='all, delete-orphan')
+    # passive_deletes: o banco apaga os logs (ON DELETE CASCADE); o ORM nao carrega cada Log para deletar
+    logs = db.relationship('Log', back_populates='honeypot', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     
-    def to_dict(self):
+    def to_dict(self, only=None):
+        if only is not None:
+            # Subconjunto (?fields=): so toca os atributos carregados via load_only
+            return {field: self._field_value(field) for field in only}
+        state = self.__dict__
+        try:
+            # Atalho: colunas carregadas ficam no __dict__ da instancia; ler direto evita o descriptor
+            # do ORM por atributo (~3x mais rapido por linha na listagem)
+            return {
+                'id': state['id'],
+                'name': state['name'],
+                'type': state['type'],
+                'host': state['host'],
+                'port': state['port'],
+                'status': state['status'],
+                'created_at': state['created_at'].isoformat(),
+                'logs_count': state['logs_count']
+            }
+        except KeyError:
+            pass
+        # Atributo expirado/deferred: o descriptor carrega do banco
         return {
             'id': self.id,
             'name': self.name,
@@ -74,20 +296,47 @@ class Honeypot(db.Model):
             'port': self.port,
             'status': self.status,
             'created_at': self.created_at.isoformat(),
-            'logs_count': len(self.logs)
+            'logs_count': self.logs_count
         }
 
+    def _field_value(self, field):
+        if field == 'created_at':
+            return self.created_at.isoformat()
+        return getattr(self, field)
+
 class Log(db.Model):
     __tablename__ = 'logs'
-    
+    __table_args__ = (
+        # Filtros de /api/logs; (filtro, timestamp, id) cobre filtro + ORDER BY timestamp DESC, id DESC
+        # e o cursor (timestamp, id) com um range scan reverso, sem filesort
+        db.Index('ix_logs_honeypot_ts', 'honeypot_id', 'timestamp', 'id'),
+        db.Index('ix_logs_ip_ts', 'ip_address', 'timestamp', 'id'),
+        db.Index('ix_logs_event_ts', 'event_type', 'timestamp', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    honeypot_id = db.Column(db.Integer, db.ForeignKey('honeypots.id'), nullable=False)
-    ip_address = db.Column(db.String(45), nullable=False)  # Support both IPv4 and IPv6
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    honeypot_id = db.Column(db.Integer, db.ForeignKey('honeypots.id', ondelete='CASCADE'), nullable=False)
+    ip_address = db.Column(PackedIP, nullable=False)  # Support both IPv4 and IPv6
+    timestamp = db.Column(db.DateTime, nullable=False, server_default=utcnow())
     event_type = db.Column(db.String(50), nullable=False)  # connection_attempt, login_attempt, command_executed, etc.
     details = db.Column(db.Text)
+
+    honeypot = db.relationship('Honeypot', back_populates='logs')
     
     def to_dict(self):
+        state = self.__dict__
+        try:
+            # Mesmo atalho do Honeypot.to_dict: le as colunas carregadas sem passar pelo descriptor
+            return {
+                'id': state['id'],
+                'honeypot_id': state['honeypot_id'],
+                'ip_address': state['ip_address'],
+                'timestamp': state['timestamp'].isoformat(),
+                'event_type': state['event_type'],
+                'details': state['details']
+            }
+        except KeyError:
+            pass
         return {
             'id': self.id,
             'honeypot_id': self.honeypot_id,
@@ -97,24 +346,47 @@ class Log(db.Model):
             'details': self.details
         }
 
+# COUNT(logs) como subquery correlacionada no proprio SELECT do honeypot, sem hidratar self.logs.
+# Deferred: so entra no SELECT com undefer() (listagens) ou ao ser acessado.
+Honeypot.logs_count = db.column_property(
+    select(func.count(Log.id)).where(Log.honeypot_id == Honeypot.id).correlate_except(Log).scalar_subquery(),
+    deferred=True,
+)
+
+# Logs sao append-only: no Postgres um BRIN em timestamp eh minusculo e ainda poda faixas de
+# tempo; os indices B-tree compostos continuam servindo as consultas filtradas
+event.listen(
+    Log.__table__,
+    'after_create',
+    DDL('CREATE INDEX ix_logs_ts_brin ON logs USING BRIN (timestamp) WITH (pages_per_range = 32)')
+    .execute_if(dialect='postgresql'),
+)
+
 # Flask-RESTX models for documentation
 honeypot_model = api.model('Honeypot', {
     'id': fields.Integer(readonly=True, description='ID único do honeypot'),
     'name': fields.String(required=True, description='Nome do honeypot'),
-    'type': fields.String(required=True, description='Tipo do honeypot', enum=['ssh', 'telnet', 'http']),
+    'type': fields.String(required=True, description='Tipo do honeypot', enum=list(HONEYPOT_TYPES)),
     'host': fields.String(description='Host do honeypot', default='0.0.0.0'),
     'port': fields.Integer(required=True, description='Porta do honeypot'),
-    'status': fields.String(description='Status do honeypot', enum=['active', 'inactive'], default='inactive'),
+    'status': fields.String(description='Status do honeypot (active, inactive, provisioning, error ou o estado do container)', default='inactive'),
     'created_at': fields.DateTime(readonly=True, description='Data de criação'),
     'logs_count': fields.Integer(readonly=True, description='Número de logs associados')
 })
 
+honeypot_status_model = api.model('HoneypotStatus', {
+    'id': fields.Integer(readonly=True, description='ID único do honeypot'),
+    'status': fields.String(readonly=True, description='Status do honeypot (provisioning enquanto o container sobe, error se falhar)'),
+    'port': fields.Integer(readonly=True, description='Porta do honeypot'),
+    'container_id': fields.String(readonly=True, description='ID do container Docker')
+})
+
 honeypot_input_model = api.model('HoneypotInput', {
     'name': fields.String(required=True, description='Nome do honeypot'),
-    'type': fields.String(required=True, description='Tipo do honeypot', enum=['ssh', 'telnet', 'http']),
+    'type': fields.String(required=True, description='Tipo do honeypot', enum=list(HONEYPOT_TYPES)),
     'host': fields.String(description='Host do honeypot', default='0.0.0.0'),
     'port': fields.Integer(required=True, description='Porta do honeypot'),
-    'status': fields.String(description='Status do honeypot', enum=['active', 'inactive'], default='inactive')
+    'status': fields.String(description='Status do honeypot (active, inactive, provisioning, error ou o estado do container)', default='inactive')
 })
 
 log_model = api.model('Log', {
@@ -133,121 +405,271 @@ log_input_model = api.model('LogInput', {
     'details': fields.String(description='Detalhes do evento')
 })
 
+log_bulk_input_model = api.model('LogBulkInput', {
+    'items': fields.List(fields.Nested(log_input_model), required=True, description='Logs a inserir (max 1000)')
+})
+
+log_bulk_result_model = api.model('LogBulkResult', {
+    'inserted': fields.Integer(description='Quantidade de logs inseridos')
+})
+
+# Specs (chave, getter) pre-compilados dos models: aplicados direto aos dicts de to_dict(),
+# sem o marshal_with do RESTX percorrer fields.* por requisicao
+HONEYPOT_MARSHAL = tuple((name, operator.itemgetter(name)) for name in honeypot_model)
+LOG_MARSHAL = tuple((name, operator.itemgetter(name)) for name in log_model)
+
+
+def fast_marshal(row, spec):
+    """Projeta um dict no formato do model a partir do spec pre-compilado."""
+    return {key: getter(row) for key, getter in spec}
+
+
+# Validadores jsonschema compilados uma vez a partir dos models do RESTX (PUT aceita payload parcial)
+honeypot_create_validator = Draft4Validator(honeypot_input_model.__schema__)
+honeypot_update_validator = Draft4Validator(
+    {key: value for key, value in honeypot_input_model.__schema__.items() if key != 'required'}
+)
+
+
+def validation_error(validator, data):
+    """Mensagem do primeiro erro de validacao, ou None se o payload for valido."""
+    error = next(validator.iter_errors(data), None)
+    if error is None:
+        return None
+    if error.validator == 'required':
+        missing = [field for field in error.validator_value if field not in error.instance]
+        return f'Missing required field: {missing[0]}'
+    if error.validator == 'enum' and error.path:
+        return f'Invalid {error.path[-1]}. Must be one of: {error.validator_value}'
+    field = '.'.join(str(part) for part in error.path)
+    return f'{field}: {error.message}' if field else error.message
+
 # Namespaces
 honeypots_ns = api.namespace('honeypots', description='Operações relacionadas aos honeypots')
 logs_ns = api.namespace('logs', description='Operações relacionadas aos logs')
 health_ns = api.namespace('health', description='Verificação de saúde da API')
 
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _add_process_time(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        response.headers['X-Process-Time-Ms'] = f'{(time.perf_counter() - start) * 1000:.1f}'
+    return response
+
+
+@app.after_request
+def _conditional_get(response):
+    """ETag nas listagens GET; If-None-Match igual responde 304 sem corpo (revalidacao do front)."""
+    if request.method != 'GET' or response.status_code != 200 or response.mimetype != 'application/json':
+        return response
+    response.add_etag()
+    etag, _ = response.get_etag()
+    # O Flask-Compress devolve o ETag como "<hash>:gzip"/"<hash>:br"; o sufixo so vale se o
+    # cliente ainda aceita aquela codificacao (senao o corpo em cache nao serve para ele)
+    for tag in request.if_none_match.as_set():
+        base, _, encoding = tag.partition(':')
+        if base == etag and (not encoding or request.accept_encodings[encoding]):
+            not_modified = Response(status=304, headers={'ETag': response.headers['ETag'], 'Vary': 'Accept-Encoding'})
+            if 'X-Next-Cursor' in response.headers:
+                not_modified.headers['X-Next-Cursor'] = response.headers['X-Next-Cursor']
+            return not_modified
+    return response
+
+
 @app.route('/')
 def index():
     return redirect('/docs/')
 
 
+def invalidate_cache():
+    """Descarta as listagens em cache apos qualquer escrita em honeypots/logs."""
+    cache.clear()
+
+
+def invalidate_honeypot_cache():
+    """Descarta a existencia de honeypots em cache (POST /api/logs?async=1) apos criar/remover honeypots."""
+    try:
+        from .log_manager import invalidate_honeypot_cache as _invalidate
+    except Exception:
+        from backend.log_manager import invalidate_honeypot_cache as _invalidate
+    _invalidate()
+
+
+def parse_honeypot_fields():
+    """?fields=id,name,status -> tupla com os campos pedidos (None = todos)."""
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    selected = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in selected if f not in HONEYPOT_FIELDS]
+    if unknown or not selected:
+        api.abort(400, f'Invalid fields: {unknown}. Must be among: {list(HONEYPOT_FIELDS)}')
+    return selected
+
+
+def parse_log_includes():
+    """?include=honeypot_name -> conjunto de campos extras pedidos."""
+    raw = request.args.get('include')
+    if not raw:
+        return set()
+    selected = {f.strip() for f in raw.split(',') if f.strip()}
+    unknown = sorted(f for f in selected if f not in LOG_INCLUDES)
+    if unknown:
+        api.abort(400, f'Invalid include: {unknown}. Must be among: {list(LOG_INCLUDES)}')
+    return selected
+
+
+def honeypot_query(selected):
+    """Query de honeypots lendo so as colunas pedidas em ?fields= (e logs_count no mesmo SELECT)."""
+    # Serializacao nunca deve tocar relacionamentos: lazy load acidental (N+1) levanta erro em vez de consultar
+    query = Honeypot.query.options(raiseload('*'))
+    if selected is not None:
+        columns = [getattr(Honeypot, f) for f in selected if f != 'logs_count'] or [Honeypot.id]
+        query = query.options(load_only(*columns))
+    if selected is None or 'logs_count' in selected:
+        query = query.options(undefer(Honeypot.logs_count))
+    return query
+
+
 @honeypots_ns.route('/')
 class HoneypotList(Resource):
     @honeypots_ns.doc('list_honeypots')
-    @honeypots_ns.marshal_list_with(honeypot_model)
+    @honeypots_ns.response(200, 'Success', [honeypot_model])
+    @honeypots_ns.param('fields', f'Campos a retornar, separados por virgula ({",".join(HONEYPOT_FIELDS)})', required=False)
+    @cache.cached(timeout=HONEYPOTS_CACHE_TTL, query_string=True)
     def get(self):
-        honeypots = Honeypot.query.all()
-        return [honeypot.to_dict() for honeypot in honeypots]
+        selected = parse_honeypot_fields()
+        honeypots = honeypot_query(selected).all()
+        return json_response([honeypot.to_dict(only=selected) for honeypot in honeypots])
 
     @honeypots_ns.doc('create_honeypot')
     @honeypots_ns.expect(honeypot_input_model)
-    @honeypots_ns.marshal_with(honeypot_model, code=201)
+    @honeypots_ns.marshal_with(honeypot_model, code=202)
     def post(self):
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            api.abort(400, 'Request body must be a JSON object')
 
         # 1. Validacoes Basicas
-        required_fields = ['name', 'type', 'port']
-        for field in required_fields:
-            if field not in data:
-                api.abort(400, f'Missing required field: {field}')
+        error = validation_error(honeypot_create_validator, data)
+        if error:
+            api.abort(400, error)
 
-        valid_types = ['ssh', 'telnet', 'http']
         hp_type = data['type']
-        if hp_type not in valid_types:
-            api.abort(400, f'Invalid type. Must be one of: {valid_types}')
 
         host = data.get('host', '0.0.0.0')
         port = data['port']
 
-        if not is_port_free(port):
+        # O worker so faz o bind depois do 202: a porta de um honeypot ainda em provisioning ja conta como ocupada
+        port_taken = db.session.scalar(
+            select(Honeypot.id).where(Honeypot.port == port, Honeypot.status != 'error').limit(1)
+        )
+        if port_taken is not None or not is_port_free(port):
             api.abort(409, f"Port {port} already in use on host.")
 
-        node_info = {}
-        try:
-            node_info = create_node(hp_type, requested_port=port)
-        except DockerException as e:
-            logger.error(f"Docker error: {e}")
-            api.abort(500, f'Error creating honeypot node in Docker: {str(e)}')
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            api.abort(500, f'Unexpected error creating honeypot node: {str(e)}')
-
-        container_id = node_info.get('container_id')
-        container_name = node_info.get('container_name')
-        real_port = node_info.get('port', port)
-        status = node_info.get('status', 'active')
-
         try:
             honeypot = Honeypot(
                 name=data['name'],
                 type=hp_type,
                 host=host,
-                port=real_port,
-                status=status,
-                container_id=container_id,
-                container_name=container_name
+                port=port,
+                status='provisioning'
             )
             db.session.add(honeypot)
             db.session.commit()
+            invalidate_cache()
+            invalidate_honeypot_cache()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro ao salvar honeypot no DB: {e}")
+            api.abort(500, 'Database error occurred.')
 
-            try:
-                from backend.log_monitor import attach_log_forwarder
-                if container_id:
-                    attach_log_forwarder(container_id, honeypot.id)
-            except ImportError:
-                logger.warning("backend.log_monitor nao encontrado. Logs nao serao coletados.")
-            except Exception as e:
-                logger.error(f"Falha ao anexar log forwarder: {e}")
+        # Container sobe em background; o cliente acompanha por GET /api/honeypots/<id>/status
+        provision_executor.submit(provision_honeypot, honeypot.id, hp_type, port)
+        return honeypot, 202
 
-            return honeypot, 201
 
+def provision_honeypot(honeypot_id, hp_type, port):
+    """Cria o container do honeypot e atualiza a linha (roda no provision_executor)."""
+    with app.app_context():
+        try:
+            node_info = create_node(hp_type, requested_port=port)
+        except Exception as e:
+            logger.error(f"Erro ao criar honeypot {honeypot_id} no Docker: {e}")
+            try:
+                honeypot = db.session.get(Honeypot, honeypot_id)
+                if honeypot is not None:
+                    honeypot.status = 'error'
+                    db.session.commit()
+                    invalidate_cache()
+            except Exception as db_error:
+                # Ninguem le o future do executor: sem este log a linha ficaria em provisioning sem rastro
+                db.session.rollback()
+                logger.error(f"Erro ao marcar honeypot {honeypot_id} como error no DB: {db_error}")
+            return
+
+        container_id = node_info.get('container_id')
+        try:
+            honeypot = db.session.get(Honeypot, honeypot_id)
+            if honeypot is None:
+                # Honeypot removido durante o provisionamento: nao deixa container orfao
+                if container_id:
+                    remove_node(container_id)
+                return
+            honeypot.container_id = container_id
+            honeypot.container_name = node_info.get('container_name')
+            honeypot.port = node_info.get('port') or port
+            honeypot.status = node_info.get('status') or 'active'
+            db.session.commit()
+            invalidate_cache()
         except Exception as e:
             db.session.rollback()
             logger.error(f"Erro ao salvar no DB, revertendo criacao do container: {e}")
-
             if container_id:
                 remove_node(container_id)
+            return
 
-            api.abort(500, 'Database error occurred. Container creation rolled back.')
-
-
+        try:
+            from backend.log_monitor import attach_log_forwarder
+            if container_id:
+                attach_log_forwarder(container_id, honeypot_id)
+        except ImportError:
+            logger.warning("backend.log_monitor nao encontrado. Logs nao serao coletados.")
+        except Exception as e:
+            logger.error(f"Falha ao anexar log forwarder: {e}")
 
 
 @honeypots_ns.route('/<int:honeypot_id>')
 @honeypots_ns.param('honeypot_id', 'ID único do honeypot')
 class HoneypotResource(Resource):
     @honeypots_ns.doc('get_honeypot')
-    @honeypots_ns.marshal_with(honeypot_model)
+    @honeypots_ns.response(200, 'Success', honeypot_model)
+    @honeypots_ns.param('fields', f'Campos a retornar, separados por virgula ({",".join(HONEYPOT_FIELDS)})', required=False)
     def get(self, honeypot_id):
         """Obtém um honeypot específico"""
-        honeypot = Honeypot.query.get_or_404(honeypot_id)
-        return honeypot.to_dict()
+        selected = parse_honeypot_fields()
+        honeypot = honeypot_query(selected).filter(Honeypot.id == honeypot_id).first_or_404()
+        return json_response(honeypot.to_dict(only=selected))
     
     @honeypots_ns.doc('update_honeypot')
     @honeypots_ns.expect(honeypot_input_model)
-    @honeypots_ns.marshal_with(honeypot_model)
+    @honeypots_ns.response(200, 'Success', honeypot_model)
     def put(self, honeypot_id):
         """Atualiza um honeypot"""
         honeypot = Honeypot.query.get_or_404(honeypot_id)
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            api.abort(400, 'Request body must be a JSON object')
         
-        # Validate honeypot type if provided
-        if 'type' in data:
-            valid_types = ['ssh', 'telnet', 'http']
-            if data['type'] not in valid_types:
-                api.abort(400, f'Invalid type. Must be one of: {valid_types}')
+        # Valida os campos enviados (type, port, status...)
+        error = validation_error(honeypot_update_validator, data)
+        if error:
+            api.abort(400, error)
         
         try:
             # Update fields
@@ -258,8 +680,9 @@ class HoneypotResource(Resource):
             honeypot.status = data.get('status', honeypot.status)
             
             db.session.commit()
+            invalidate_cache()
             
-            return honeypot.to_dict()
+            return json_response(fast_marshal(honeypot.to_dict(), HONEYPOT_MARSHAL))
         
         except Exception as e:
             db.session.rollback()
@@ -268,38 +691,30 @@ class HoneypotResource(Resource):
     @honeypots_ns.doc('delete_honeypot')
     def delete(self, honeypot_id):
         """Remove um honeypot, seu container Docker (se existir) e todos os seus logs"""
+        # Fora do try: o 404 nao pode virar 500 no except generico
+        honeypot = Honeypot.query.get_or_404(honeypot_id)
         try:
-            honeypot = Honeypot.query.get_or_404(honeypot_id)
             container_id = getattr(honeypot, 'container_id', None)
 
             container_removed = False
             removal_message = ""
             if container_id:
                 try:
-                    # remove_node deve retornar True/False
-                    from .docker_manager import remove_node as _remove_node
-                except Exception:
-                    # fallback import (robusto)
-                    try:
-                        from backend.docker_manager import remove_node as _remove_node
-                    except Exception:
-                        _remove_node = None
-
-                if _remove_node:
-                    try:
-                        container_removed = _remove_node(container_id)
-                        removal_message = "container_removed" if container_removed else "container_not_removed"
-                    except Exception as e:
-                        container_removed = False
-                        removal_message = f"container_remove_error: {str(e)}"
-                else:
-                    removal_message = "no_remove_node_available"
+                    # remove_node retorna True/False
+                    container_removed = remove_node(container_id)
+                    removal_message = "container_removed" if container_removed else "container_not_removed"
+                except Exception as e:
+                    container_removed = False
+                    removal_message = f"container_remove_error: {str(e)}"
             else:
                 removal_message = "no_container_id"
 
-            # remover o registro do DB (logs em cascade)
+            # Logs num unico DELETE em lote; tambem cobre bancos criados antes do ON DELETE CASCADE
+            db.session.execute(delete(Log).where(Log.honeypot_id == honeypot.id))
             db.session.delete(honeypot)
             db.session.commit()
+            invalidate_cache()
+            invalidate_honeypot_cache()
 
             return {
                 'message': 'Honeypot deleted successfully',
@@ -311,44 +726,136 @@ class HoneypotResource(Resource):
             api.abort(500, f'Error deleting honeypot: {str(e)}')
 
 
+@honeypots_ns.route('/<int:honeypot_id>/status')
+@honeypots_ns.param('honeypot_id', 'ID único do honeypot')
+class HoneypotStatus(Resource):
+    @honeypots_ns.doc('get_honeypot_status')
+    @honeypots_ns.marshal_with(honeypot_status_model)
+    def get(self, honeypot_id):
+        """Status do provisionamento do honeypot (sem cache, para polling apos o 202)"""
+        columns = (Honeypot.id, Honeypot.status, Honeypot.port, Honeypot.container_id)
+        return Honeypot.query.options(load_only(*columns)).filter(Honeypot.id == honeypot_id).first_or_404()
+
+
+def encode_log_cursor(timestamp, log_id):
+    return base64.urlsafe_b64encode(f'{timestamp.isoformat()}|{log_id}'.encode()).decode()
+
+
+def decode_log_cursor(cursor):
+    """Cursor opaco -> (timestamp, id) do ultimo log da pagina anterior. ValueError se invalido."""
+    try:
+        ts, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(ts), int(log_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def encode_log_page(result, limit=None):
+    """Serializa ate `limit` linhas (None = todas) em lotes de LOGS_ENCODE_BATCH; retorna (corpo JSON, ultima linha se houver mais)."""
+    chunks, count, last, has_more = [], 0, None, False
+    for partition in result.partitions(LOGS_ENCODE_BATCH):
+        rows = [dict(row) for row in partition]
+        if limit is not None and count + len(rows) > limit:
+            has_more = True
+            rows = rows[:limit - count]
+        if rows:
+            # Cada lote vira bytes e os dicts sao descartados; o pico de memoria fica em um lote
+            chunks.append(orjson.dumps(rows)[1:-1])
+            count += len(rows)
+            last = rows[-1]
+    return b'[' + b','.join(chunks) + b']', (last if has_more else None)
+
+
 @logs_ns.route('/')
 class LogList(Resource):
     @logs_ns.doc('list_logs')
-    @logs_ns.marshal_list_with(log_model)
+    @logs_ns.response(200, 'Success', [log_model])
+    @cache.cached(timeout=LOGS_CACHE_TTL, query_string=True)
     @logs_ns.param('honeypot_id', 'Filtra por ID do honeypot', type='integer', required=False)
     @logs_ns.param('ip_address', 'Filtra por endereço IP', required=False)
     @logs_ns.param('event_type', 'Filtra por tipo de evento', required=False)
+    @logs_ns.param('limit', f'Tamanho da pagina (padrao {LOGS_DEFAULT_LIMIT} com cursor, max {LOGS_MAX_LIMIT}); sem limit/cursor lista tudo', type='integer', required=False)
+    @logs_ns.param('cursor', 'Cursor da proxima pagina (header X-Next-Cursor da resposta anterior)', required=False)
+    @logs_ns.param('include', f'Campos extras por log: {", ".join(LOG_INCLUDES)}', required=False)
     def get(self):
-        """Lista todos os logs com filtros opcionais"""
+        """Lista os logs (mais recentes primeiro) com filtros opcionais e paginacao por cursor"""
         honeypot_id = request.args.get('honeypot_id', type=int)
         ip_address = request.args.get('ip_address')
         event_type = request.args.get('event_type')
+        cursor = request.args.get('cursor')
+        # Paginacao so quando o cliente pede (limit ou cursor); sem eles, listagem completa como antes
+        limit = None
+        if 'limit' in request.args or cursor:
+            limit = request.args.get('limit', LOGS_DEFAULT_LIMIT, type=int)
+            limit = max(1, min(limit, LOGS_MAX_LIMIT))
+        includes = parse_log_includes()
         
-        query = Log.query
-        
+        # Colunas via Core: sem instancias ORM nem identity map, direto para o orjson
+        query = select(Log.id, Log.honeypot_id, Log.ip_address, Log.timestamp, Log.event_type, Log.details)
+        if 'honeypot_name' in includes:
+            # Nome no mesmo SELECT: o cliente nao precisa buscar /honeypots so para montar o mapa id -> nome
+            query = query.add_columns(Honeypot.name.label('honeypot_name')).join(Honeypot, Honeypot.id == Log.honeypot_id)
+
         if honeypot_id:
-            query = query.filter(Log.honeypot_id == honeypot_id)
+            query = query.where(Log.honeypot_id == honeypot_id)
         if ip_address:
-            query = query.filter(Log.ip_address == ip_address)
+            try:
+                pack_ip(ip_address)
+            except ValueError as ve:
+                api.abort(400, str(ve))
+            query = query.where(Log.ip_address == ip_address)
         if event_type:
-            query = query.filter(Log.event_type == event_type)
-        
-        logs = query.order_by(Log.timestamp.desc()).all()
-        return [log.to_dict() for log in logs]
+            query = query.where(Log.event_type == event_type)
+        if cursor:
+            # Keyset: continua a partir do ultimo (timestamp, id) visto, sem OFFSET
+            try:
+                cursor_ts, cursor_id = decode_log_cursor(cursor)
+            except ValueError as ve:
+                api.abort(400, str(ve))
+            query = query.where(tuple_(Log.timestamp, Log.id) < (cursor_ts, cursor_id))
+
+        query = query.order_by(Log.timestamp.desc(), Log.id.desc())
+        if limit is not None:
+            query = query.limit(limit + 1)
+        # yield_per: cursor server-side onde o driver suporta, linhas chegam em lotes
+        result = db.session.execute(query.execution_options(yield_per=LOGS_ENCODE_BATCH)).mappings()
+        body, last = encode_log_page(result, limit)
+
+        # Corpo montado (nao streamado) para continuar cacheavel e comprimivel
+        response = Response(body, mimetype='application/json')
+        if last is not None:
+            response.headers['X-Next-Cursor'] = encode_log_cursor(last['timestamp'], last['id'])
+        return response
     
     @logs_ns.doc('create_log')
     @logs_ns.expect(log_input_model)
-    @logs_ns.marshal_with(log_model, code=201)
+    @logs_ns.response(201, 'Created', log_model)
+    @logs_ns.response(202, 'Accepted (async=1)')
+    @logs_ns.param('async', 'Enfileira o log para o writer em lote e responde 202 sem esperar o commit', type='boolean', required=False)
     def post(self):
         data = request.get_json()
         try:
-            from .log_manager import process_log_safe
+            from .log_manager import HoneypotNotFound, enqueue_log, process_log_safe
         except Exception:
-            from backend.log_manager import process_log_safe
+            from backend.log_manager import HoneypotNotFound, enqueue_log, process_log_safe
+
+        if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+            try:
+                enqueue_log(data)
+            except HoneypotNotFound as nf:
+                api.abort(404, str(nf))
+            except ValueError as ve:
+                api.abort(400, str(ve))
+            except queue.Full:
+                api.abort(503, 'Log queue is full, retry later')
+            return json_response({'accepted': True}, status=202)
 
         try:
             created = process_log_safe(data)
-            return created, 201
+            invalidate_cache()
+            return json_response(fast_marshal(created, LOG_MARSHAL), status=201)
+        except HoneypotNotFound as nf:
+            api.abort(404, str(nf))
         except ValueError as ve:
             api.abort(400, str(ve))
         except RuntimeError as re:
@@ -357,15 +864,44 @@ class LogList(Resource):
             api.abort(500, f'Unexpected error creating log: {str(e)}')
 
 
+@logs_ns.route('/bulk')
+class LogBulk(Resource):
+    @logs_ns.doc('create_logs_bulk')
+    @logs_ns.expect(log_bulk_input_model)
+    @logs_ns.marshal_with(log_bulk_result_model, code=201)
+    def post(self):
+        """Insere varios logs numa unica transacao"""
+        data = request.get_json()
+        if not isinstance(data, (list, dict)):
+            api.abort(400, 'Request body must be a JSON array or an object with "items"')
+        try:
+            from .log_manager import process_logs_bulk_safe
+        except Exception:
+            from backend.log_manager import process_logs_bulk_safe
+
+        try:
+            # Aceita {"items": [...]} ou o array JSON direto
+            items = data if isinstance(data, list) else data.get('items')
+            inserted = process_logs_bulk_safe(items)
+            invalidate_cache()
+            return {'inserted': inserted}, 201
+        except ValueError as ve:
+            api.abort(400, str(ve))
+        except RuntimeError as re:
+            api.abort(500, f'Error persisting logs: {str(re)}')
+        except Exception as e:
+            api.abort(500, f'Unexpected error creating logs: {str(e)}')
+
+
 @logs_ns.route('/<int:log_id>')
 @logs_ns.param('log_id', 'ID único do log')
 class LogResource(Resource):
     @logs_ns.doc('get_log')
-    @logs_ns.marshal_with(log_model)
+    @logs_ns.response(200, 'Success', log_model)
     def get(self, log_id):
         """Obtém um log específico"""
         log = Log.query.get_or_404(log_id)
-        return log.to_dict()
+        return json_response(fast_marshal(log.to_dict(), LOG_MARSHAL))
     
     @logs_ns.doc('delete_log')
     def delete(self, log_id):
@@ -374,6 +910,7 @@ class LogResource(Resource):
             log = Log.query.get_or_404(log_id)
             db.session.delete(log)
             db.session.commit()
+            invalidate_cache()
             
             return {'message': 'Log deleted successfully'}, 200
         
@@ -387,7 +924,22 @@ class HealthCheck(Resource):
     def get(self):
         return {'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()}
 
-if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+
+_swagger_json = None
+
+
+def swagger_json():
+    """swagger.json codificado uma unica vez: o schema nao muda depois de registradas as rotas."""
+    global _swagger_json
+    if _swagger_json is None:
+        schema = api.__schema__
+        if 'error' in schema:
+            return json_response(schema, status=500)
+        _swagger_json = orjson.dumps(schema)
+    response = Response(_swagger_json, mimetype='application/json')
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response
+
+
+app.view_functions['specs'] = swagger_json
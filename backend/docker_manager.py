@@ -1,10 +1,14 @@
 # backend/docker_manager.py
-import random
+import os
+import secrets
 import time
 import socket
 import logging
+import threading
 from typing import Optional
 
+__all__ = ["create_node", "remove_node", "is_port_free", "check_docker_available", "get_client", "reset_client"]
+
 logger = logging.getLogger("beehive.docker_manager")
 if not logger.handlers:
     handler = logging.StreamHandler()
@@ -16,14 +20,44 @@ if not logger.handlers:
     logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
-def check_docker_available(timeout_sec: int = 3) -> bool:
+# Cache curto das sondagens (bind de porta, version() do daemon) para rajadas de requisicoes
+PORT_CHECK_TTL = 1.0
+DOCKER_CHECK_TTL = 5.0
+_probe_cache = {}
+_probe_lock = threading.Lock()
+
+
+def _cached_probe(key, ttl: float, probe) -> bool:
+    now = time.monotonic()
+    with _probe_lock:
+        hit = _probe_cache.get(key)
+        if hit is not None and now - hit[0] < ttl:
+            return hit[1]
+    value = probe()
+    with _probe_lock:
+        _probe_cache[key] = (now, value)
+    return value
+
+
+def invalidate_probes() -> None:
+    """Descarta resultados em cache (containers criados/removidos mudam as portas em uso)."""
+    with _probe_lock:
+        _probe_cache.clear()
+
+
+def _docker_available(timeout_sec: int) -> bool:
     try:
         client = get_client()
         client.version(timeout=timeout_sec)
         return True
-    except Exception:
+    except Exception as e:
+        _handle_client_error(e)
         return False
 
+
+def check_docker_available(timeout_sec: int = 3) -> bool:
+    return _cached_probe("docker", DOCKER_CHECK_TTL, lambda: _docker_available(timeout_sec))
+
 # NOTE: use "tcp" protocol consistently
 HONEYPOT_CONFIG = {
     "ssh": {
@@ -46,7 +80,12 @@ HONEYPOT_CONFIG = {
 }
 
 
-def get_client():
+# Um unico DockerClient por processo (sessao HTTP/urllib3 thread-safe, reaproveita conexoes)
+_client = None
+_client_lock = threading.Lock()
+
+
+def _create_client():
     try:
         import docker
     except Exception as e:
@@ -70,35 +109,45 @@ def get_client():
         raise RuntimeError(f"Erro ao conectar ao daemon Docker: {e}") from e
 
 
-def create_node(node_type: str, requested_port: Optional[int] = None) -> dict:
-    """
-    Create and start a container for the given honeypot type.
-    requested_port: host port (int) or None for random assignment.
-    Returns a dict with container metadata.
-    """
-    if node_type not in HONEYPOT_CONFIG:
-        raise ValueError(f"Node type '{node_type}' not supported")
+def get_client():
+    global _client
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+            client = _client
+    return client
 
-    cfg = HONEYPOT_CONFIG[node_type]
-    image = cfg["image"]
-    container_port = cfg["container_port"]
-    extra_env = cfg.get("extra_env", {})
 
-    name = f"{node_type}-node-{random.randint(1000, 9999)}"
+def reset_client() -> None:
+    """Descarta o cliente em cache; o proximo get_client() reconecta."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
 
-    env = {}
-    env.update(extra_env)
 
-    ports = {container_port: (requested_port if requested_port else None)}
+def _handle_client_error(exc: Exception) -> None:
+    # Erros de API/conexao podem deixar a sessao HTTP invalida (daemon reiniciado, socket fechado)
+    try:
+        from docker.errors import APIError, NotFound
+        from requests.exceptions import ConnectionError as RequestsConnectionError
+    except Exception:
+        return
+    if isinstance(exc, (APIError, RequestsConnectionError)) and not isinstance(exc, NotFound):
+        reset_client()
 
-    client = get_client()
 
+def _build_run_kwargs(node_type: str, cfg: dict) -> dict:
     run_kwargs = dict(
-        image=image,
+        image=cfg["image"],
         detach=True,
-        name=name,
-        environment=env,
-        ports=ports,
+        environment=dict(cfg.get("extra_env", {})),
         restart_policy={"Name": "unless-stopped"},
         labels={
             "project": "beehive",
@@ -110,29 +159,103 @@ def create_node(node_type: str, requested_port: Optional[int] = None) -> dict:
         mem_limit="512m",
         cpu_shares=256,
     )
-
     if cfg.get("user"):
         run_kwargs["user"] = cfg["user"]
+    return run_kwargs
+
+
+# kwargs de containers.run() por tipo, montados uma vez no import (tratar como somente leitura)
+_RUN_KWARGS = {node_type: _build_run_kwargs(node_type, cfg) for node_type, cfg in HONEYPOT_CONFIG.items()}
 
-    container = client.containers.run(**run_kwargs)
 
-    host_port = None
-    # wait for the host port to appear in the container's NetworkSettings
-    for i in range(20):  # ~4s max (20 * 0.2)
+PORT_WAIT_TIMEOUT = 2.0
+
+
+def _mapped_host_port(container, container_port: str) -> Optional[int]:
+    ports_info = (container.attrs.get("NetworkSettings") or {}).get("Ports") or {}
+    mapping = ports_info.get(container_port)
+    if mapping and isinstance(mapping, list):
         try:
-            container.reload()
-            ports_info = container.attrs.get("NetworkSettings", {}).get("Ports", {})
-            mapping = ports_info.get(container_port)
-            if mapping and isinstance(mapping, list) and len(mapping) > 0:
-                try:
-                    host_port = int(mapping[0].get("HostPort"))
-                except Exception:
-                    host_port = None
+            return int(mapping[0].get("HostPort"))
+        except Exception:
+            return None
+    return None
+
+
+def _wait_host_port(client, container, container_port: str, since: int) -> Optional[int]:
+    """
+    Wait for the host port to appear in the container's NetworkSettings.
+    containers.run() already returns a started container, so one reload usually suffices;
+    otherwise block on the daemon's 'start' event, polling only as a last resort.
+    """
+    try:
+        container.reload()
+        host_port = _mapped_host_port(container, container_port)
+        if host_port:
+            return host_port
+    except Exception as e:
+        logger.debug("Waiting for container port mapping: %s", e)
+
+    try:
+        events = client.events(
+            decode=True,
+            since=since,
+            until=int(time.time() + PORT_WAIT_TIMEOUT) + 1,
+            filters={"container": container.id, "event": "start"},
+        )
+        try:
+            for _ in events:
                 break
+        finally:
+            events.close()
+        container.reload()
+        host_port = _mapped_host_port(container, container_port)
+        if host_port:
+            return host_port
+    except Exception as e:
+        logger.debug("Docker events unavailable, polling port mapping: %s", e)
+
+    deadline = time.monotonic() + PORT_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.2)
+        try:
+            container.reload()
+            host_port = _mapped_host_port(container, container_port)
+            if host_port:
+                return host_port
         except Exception as e:
             logger.debug("Waiting for container port mapping: %s", e)
-        time.sleep(0.2)
+    return None
 
+
+def create_node(node_type: str, requested_port: Optional[int] = None) -> dict:
+    """
+    Create and start a container for the given honeypot type.
+    requested_port: host port (int) or None for random assignment.
+    Returns a dict with container metadata.
+    """
+    if node_type not in HONEYPOT_CONFIG:
+        raise ValueError(f"Node type '{node_type}' not supported")
+
+    container_port = HONEYPOT_CONFIG[node_type]["container_port"]
+    name = f"{node_type}-node-{secrets.token_hex(4)}"
+
+    # So nome e portas variam por chamada; o resto vem pronto de _RUN_KWARGS
+    run_kwargs = _RUN_KWARGS[node_type].copy()
+    run_kwargs["name"] = name
+    run_kwargs["ports"] = {container_port: (requested_port if requested_port else None)}
+
+    client = get_client()
+
+    since = int(time.time())
+    try:
+        container = client.containers.run(**run_kwargs)
+    except Exception as e:
+        _handle_client_error(e)
+        raise
+    host_port = _wait_host_port(client, container, container_port, since)
+
+    invalidate_probes()
     return {
         "container_id": getattr(container, "id", None),
         "container_name": getattr(container, "name", None),
@@ -160,6 +283,7 @@ def remove_node(container_id: str, timeout: int = 5) -> bool:
         logger.info("Container %s not found (already removed).", container_id)
         return True
     except Exception as e:
+        _handle_client_error(e)
         logger.error("Erro ao obter container %s: %s", container_id, e)
         return False
 
@@ -169,18 +293,27 @@ def remove_node(container_id: str, timeout: int = 5) -> bool:
         except Exception:
             logger.debug("Falha ao parar container %s; tentando remover direto", container_id)
         container.remove(force=True)
+        invalidate_probes()
         logger.info("Container %s removido com sucesso.", container_id)
         return True
     except Exception as e:
+        _handle_client_error(e)
         logger.error("Erro ao remover container %s: %s", container_id, e)
         return False
 
 
-def is_port_free(port: int, host: str = "0.0.0.0") -> bool:
+def _port_free(port: int, host: str) -> bool:
+    # bind() nao bloqueia: nao ha timeout a esperar, so um syscall por porta
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.settimeout(0.5)
+        if os.name != "nt":
+            # Ignora sockets em TIME_WAIT (falso "ocupado"); no Windows SO_REUSEADDR permitiria roubar a porta
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         try:
             s.bind((host, port))
             return True
         except OSError:
             return False
+
+
+def is_port_free(port: int, host: str = "0.0.0.0") -> bool:
+    return _cached_probe(("port", host, port), PORT_CHECK_TTL, lambda: _port_free(port, host))
@@ -1,75 +1,196 @@
+import os
+import queue
+import socket
+import selectors
 import threading
-import json
 import logging
-from datetime import datetime
+import ipaddress
+import orjson
 from backend.docker_manager import get_client
-
-from backend.app import app, db, Log
+from backend.log_manager import enqueue_log_row
 
 logger = logging.getLogger("beehive.log_monitor")
 
 
 def parse_and_save_log(line_bytes, honeypot_id):
-    line_str = line_bytes.decode('utf-8', errors='ignore').strip()
-    if not line_str:
+    line_bytes = line_bytes.strip()
+    if not line_bytes:
         return
 
-    data = {}
-    event_type = "unknown"
-    details = line_str
+    event_type = "raw_output"
     ip_address = "0.0.0.0"
+    # A linha original vai para details: se for JSON ja eh valido, sem decode + re-encode
+    details = line_bytes.decode('utf-8', errors='ignore')
 
-    # Tenta decodificar JSON (padrao Cowrie)
+    # Tenta decodificar JSON (padrao Cowrie) direto dos bytes; so eventid/src_ip sao usados
     try:
-        data = json.loads(line_str)
-        event_type = data.get("eventid", "generic_event")
+        data = orjson.loads(line_bytes)
+    except orjson.JSONDecodeError:
+        # Se nao for JSON (ex: Dionaea raw), fica como texto
+        data = None
+    if isinstance(data, dict):
+        eventid = data.get("eventid")
+        # null/numero/objeto (ou maior que a coluna String(50)) derrubaria o lote inteiro no INSERT
+        event_type = eventid if isinstance(eventid, str) and 0 < len(eventid) <= 50 else "generic_event"
         ip_address = data.get("src_ip", "0.0.0.0")
-        details = json.dumps(data)  # Salva o JSON completo nos detalhes
-    except json.JSONDecodeError:
-        # Se nao for JSON (ex: Dionaea raw), salva como texto
-        event_type = "raw_output"
-
-    # Criar registro no banco
-    # Eh necessario usar app.app_context() pois estamos em uma thread
-    with app.app_context():
+
+    try:
+        ipaddress.ip_address(str(ip_address))
+    except ValueError:
+        # src_ip invalido nao pode derrubar o lote inteiro no INSERT
+        ip_address = "0.0.0.0"
+
+    # Writer em lote (log_manager): um INSERT/commit a cada LOG_BATCH_SIZE linhas ou LOG_FLUSH_INTERVAL s
+    enqueue_log_row({
+        "honeypot_id": honeypot_id,
+        "ip_address": ip_address,
+        "event_type": event_type,
+        "details": details,
+    })
+
+
+class _LogStream:
+    """Socket de attach de um container + buffers do protocolo multiplexado do Docker."""
+
+    __slots__ = ("container_id", "honeypot_id", "sock", "frames", "partial")
+
+    def __init__(self, container_id, honeypot_id, sock):
+        self.container_id = container_id
+        self.honeypot_id = honeypot_id
+        self.sock = sock
+        self.frames = bytearray()
+        self.partial = bytearray()
+
+    def feed(self, chunk):
+        """Consome bytes do socket e devolve as linhas completas."""
+        # Sem TTY o Docker envia frames: 1 byte stream, 3 de padding, 4 de tamanho (big-endian), payload
+        self.frames += chunk
+        while len(self.frames) >= 8:
+            size = int.from_bytes(self.frames[4:8], "big")
+            if len(self.frames) < 8 + size:
+                break
+            self.partial += self.frames[8:8 + size]
+            del self.frames[:8 + size]
+        *lines, rest = self.partial.split(b"\n")
+        self.partial = rest
+        return [bytes(line) for line in lines]
+
+
+def _recv(sock, size=65536):
+    if hasattr(sock, "recv"):
+        return sock.recv(size)
+    if isinstance(sock, socket.SocketIO):
+        return sock.read(size)
+    return os.read(sock.fileno(), size)
+
+
+# Uma unica thread le os streams de todos os containers via selectors, em vez de uma thread por container
+_streams = {}
+_streams_lock = threading.Lock()
+_pending = queue.Queue()
+_selector = None
+_wakeup_r = _wakeup_w = None
+_reader_thread = None
+
+
+def _register_pending():
+    while True:
         try:
-            new_log = Log(
-                honeypot_id=honeypot_id,
-                ip_address=ip_address,
-                event_type=event_type,
-                details=details,
-                timestamp=datetime.utcnow()
-            )
-            db.session.add(new_log)
-            db.session.commit()
-        except Exception as e:
-            logger.error(f"Erro ao salvar log no DB: {e}")
-            db.session.rollback()
-
-
-def _monitor_loop(container_id, honeypot_id):
-    """Loop infinito que fica lendo o stream do container."""
+            stream = _pending.get_nowait()
+        except queue.Empty:
+            return
+        _selector.register(stream.sock, selectors.EVENT_READ, stream)
+
+
+def _close_stream(stream, reason=""):
+    try:
+        _selector.unregister(stream.sock)
+    except Exception:
+        pass
     try:
-        client = get_client()
-        container = client.containers.get(container_id)
+        stream.sock.close()
+    except Exception:
+        pass
+    with _streams_lock:
+        _streams.pop(stream.container_id, None)
+    logger.info(f"Monitoramento do container {stream.container_id} parou {reason}".rstrip())
 
-        # stream=True e follow=True mantem a conexao aberta recebendo logs em tempo real
-        for line in container.logs(stream=True, follow=True, tail=0):
-            parse_and_save_log(line, honeypot_id)
 
-    except Exception as e:
-        logger.error(f"Monitoramento do container {container_id} parou: {e}")
+def _read_stream(stream):
+    try:
+        chunk = _recv(stream.sock)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError as e:
+        _close_stream(stream, f"({e})")
+        return
+    if not chunk:
+        # EOF: container parou ou foi removido; a ultima linha pode ter vindo sem "\n"
+        if stream.partial:
+            parse_and_save_log(bytes(stream.partial), stream.honeypot_id)
+        _close_stream(stream)
+        return
+    for line in stream.feed(chunk):
+        parse_and_save_log(line, stream.honeypot_id)
+
+
+def _reader_loop():
+    """Loop infinito multiplexando os sockets de todos os containers monitorados."""
+    while True:
+        for key, _ in _selector.select():
+            if key.data is None:
+                _wakeup_r.recv(4096)
+                _register_pending()
+                continue
+            try:
+                _read_stream(key.data)
+            except Exception as e:
+                logger.error(f"Erro lendo logs do container {key.data.container_id}: {e}")
+                _close_stream(key.data)
+
+
+def _ensure_reader():
+    global _selector, _wakeup_r, _wakeup_w, _reader_thread
+    with _streams_lock:
+        if _reader_thread is not None:
+            return
+        _selector = selectors.DefaultSelector()
+        _wakeup_r, _wakeup_w = socket.socketpair()
+        _selector.register(_wakeup_r, selectors.EVENT_READ, None)
+        _reader_thread = threading.Thread(
+            target=_reader_loop,
+            name="log-reader",
+            daemon=True  # daemon=True mata a thread se o app principal cair
+        )
+        _reader_thread.start()
 
 
 def attach_log_forwarder(container_id, honeypot_id):
-    """Inicia uma thread para monitorar o container especificado."""
+    """Passa a encaminhar os logs do container para o banco (um attach por container)."""
     if not container_id:
         return
 
-    t = threading.Thread(
-        target=_monitor_loop,
-        args=(container_id, honeypot_id),
-        daemon=True  # daemon=True mata a thread se o app principal cair
-    )
-    t.start()
-    logger.info(f"Monitor de logs iniciado para container {container_id}")
\ No newline at end of file
+    with _streams_lock:
+        if container_id in _streams:
+            return
+        _streams[container_id] = None
+
+    try:
+        # attach (logs=0) recebe so a saida nova, como logs(follow=True, tail=0)
+        sock = get_client().api.attach_socket(
+            container_id, params={"stdout": 1, "stderr": 1, "stream": 1, "logs": 0}
+        )
+    except Exception as e:
+        with _streams_lock:
+            _streams.pop(container_id, None)
+        logger.error(f"Monitoramento do container {container_id} nao iniciou: {e}")
+        return
+
+    _ensure_reader()
+    stream = _LogStream(container_id, honeypot_id, sock)
+    with _streams_lock:
+        _streams[container_id] = stream
+    # O registro no selector acontece na thread leitora; o byte no socketpair a acorda do select()
+    _pending.put(stream)
+    _wakeup_w.send(b"\0")
+    logger.info(f"Monitor de logs iniciado para container {container_id}")
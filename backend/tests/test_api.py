@@ -5,13 +5,17 @@ Simple test script for Beehive Backend API
 import requests
 import json
 import sys
+import time
 
 BASE_URL = "http://localhost:5000/api"
 
+# Uma sessao para todo o script: reaproveita a conexao (keep-alive) entre as chamadas
+session = requests.Session()
+
 def test_health():
     """Test health endpoint"""
     print("Testing health endpoint...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = session.get(f"{BASE_URL}/health")
     assert response.status_code == 200
     data = response.json()
     assert data['status'] == 'healthy'
@@ -27,24 +31,48 @@ def test_honeypots():
         "type": "ssh",
         "port": 2222
     }
-    response = requests.post(f"{BASE_URL}/honeypots", json=honeypot_data)
-    assert response.status_code == 201
+    response = session.post(f"{BASE_URL}/honeypots", json=honeypot_data)
+    assert response.status_code == 202
     honeypot = response.json()
     honeypot_id = honeypot['id']
     assert honeypot['name'] == "Test SSH Honeypot"
     assert honeypot['type'] == "ssh"
     assert honeypot['port'] == 2222
     print("✅ Honeypot creation working")
+
+    # Test provisioning status: o container sobe em background, espera sair de provisioning
+    deadline = time.monotonic() + 60
+    while True:
+        response = session.get(f"{BASE_URL}/honeypots/{honeypot_id}/status")
+        assert response.status_code == 200
+        status = response.json()
+        assert status['id'] == honeypot_id
+        assert status['port'] == 2222
+        if status['status'] != "provisioning":
+            break
+        assert time.monotonic() < deadline, "Honeypot stuck in provisioning"
+        time.sleep(0.5)
+    print(f"✅ Honeypot status working ({status['status']})")
+
+    # Test port conflict: a porta continua reservada enquanto o honeypot nao estiver em erro
+    if status['status'] != "error":
+        response = session.post(f"{BASE_URL}/honeypots", json=honeypot_data)
+        assert response.status_code == 409
+        print("✅ Port conflict detection working")
+
+    response = session.get(f"{BASE_URL}/honeypots/99999/status")
+    assert response.status_code == 404
+    print("✅ Honeypot status 404 working")
     
     # Test getting honeypots
-    response = requests.get(f"{BASE_URL}/honeypots")
+    response = session.get(f"{BASE_URL}/honeypots")
     assert response.status_code == 200
     honeypots = response.json()
     assert len(honeypots) >= 1
     print("✅ Honeypots listing working")
     
     # Test getting single honeypot
-    response = requests.get(f"{BASE_URL}/honeypots/{honeypot_id}")
+    response = session.get(f"{BASE_URL}/honeypots/{honeypot_id}")
     assert response.status_code == 200
     honeypot = response.json()
     assert honeypot['id'] == honeypot_id
@@ -63,7 +91,7 @@ def test_logs(honeypot_id):
         "event_type": "connection_attempt",
         "details": "Test connection attempt"
     }
-    response = requests.post(f"{BASE_URL}/logs", json=log_data)
+    response = session.post(f"{BASE_URL}/logs", json=log_data)
     assert response.status_code == 201
     log = response.json()
     log_id = log['id']
@@ -73,21 +101,21 @@ def test_logs(honeypot_id):
     print("✅ Log creation working")
     
     # Test getting logs
-    response = requests.get(f"{BASE_URL}/logs")
+    response = session.get(f"{BASE_URL}/logs")
     assert response.status_code == 200
     logs = response.json()
     assert len(logs) >= 1
     print("✅ Logs listing working")
     
     # Test filtering logs by honeypot
-    response = requests.get(f"{BASE_URL}/logs?honeypot_id={honeypot_id}")
+    response = session.get(f"{BASE_URL}/logs?honeypot_id={honeypot_id}")
     assert response.status_code == 200
     logs = response.json()
     assert all(log['honeypot_id'] == honeypot_id for log in logs)
     print("✅ Logs filtering by honeypot working")
     
     # Test filtering logs by IP
-    response = requests.get(f"{BASE_URL}/logs?ip_address=192.168.1.100")
+    response = session.get(f"{BASE_URL}/logs?ip_address=192.168.1.100")
     assert response.status_code == 200
     logs = response.json()
     assert all(log['ip_address'] == "192.168.1.100" for log in logs)
@@ -95,12 +123,78 @@ def test_logs(honeypot_id):
     
     return log_id
 
+def test_logs_bulk(honeypot_id):
+    """Test bulk log ingestion"""
+    print("Testing bulk logs...")
+
+    items = [
+        {"honeypot_id": honeypot_id, "ip_address": f"10.0.0.{i}", "event_type": "connection_attempt"}
+        for i in range(1, 11)
+    ]
+    response = session.post(f"{BASE_URL}/logs/bulk", json={"items": items})
+    assert response.status_code == 201
+    assert response.json()['inserted'] == 10
+    print("✅ Bulk log creation working")
+
+    # Test bulk with unknown honeypot
+    response = session.post(f"{BASE_URL}/logs/bulk", json={"items": [
+        {"honeypot_id": 99999, "ip_address": "1.2.3.4", "event_type": "test"}
+    ]})
+    assert response.status_code == 400
+    print("✅ Bulk honeypot validation working")
+
+    # Test bulk with a body that is neither a list nor an object
+    response = session.post(f"{BASE_URL}/logs/bulk", json="x")
+    assert response.status_code == 400
+    print("✅ Bulk body validation working")
+
+def test_logs_pagination(honeypot_id):
+    """Test cursor pagination of logs"""
+    print("Testing logs pagination...")
+
+    response = session.get(f"{BASE_URL}/logs?honeypot_id={honeypot_id}&limit=5")
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page) == 5
+    cursor = response.headers.get('X-Next-Cursor')
+    assert cursor
+    print("✅ Logs first page working")
+
+    response = session.get(f"{BASE_URL}/logs?honeypot_id={honeypot_id}&limit=5&cursor={cursor}")
+    assert response.status_code == 200
+    second_page = response.json()
+    assert second_page
+    assert not {log['id'] for log in first_page} & {log['id'] for log in second_page}
+    print("✅ Logs next page working")
+
+    # Test invalid cursor
+    response = session.get(f"{BASE_URL}/logs?cursor=invalid")
+    assert response.status_code == 400
+    print("✅ Cursor validation working")
+
+def test_logs_unpaginated(honeypot_id):
+    """Test that a listing without limit/cursor returns every log"""
+    print("Testing unpaginated logs...")
+
+    items = [
+        {"honeypot_id": honeypot_id, "ip_address": f"10.1.0.{i}", "event_type": "unpaginated_test"}
+        for i in range(1, 151)
+    ]
+    response = session.post(f"{BASE_URL}/logs/bulk", json={"items": items})
+    assert response.status_code == 201
+
+    response = session.get(f"{BASE_URL}/logs?honeypot_id={honeypot_id}&event_type=unpaginated_test")
+    assert response.status_code == 200
+    assert len(response.json()) == 150
+    assert 'X-Next-Cursor' not in response.headers
+    print("✅ Unpaginated logs listing working")
+
 def test_validation():
     """Test input validation"""
     print("Testing validation...")
     
     # Test invalid honeypot type
-    response = requests.post(f"{BASE_URL}/honeypots", json={
+    response = session.post(f"{BASE_URL}/honeypots", json={
         "name": "Invalid",
         "type": "invalid",
         "port": 1234
@@ -109,14 +203,14 @@ def test_validation():
     print("✅ Honeypot type validation working")
     
     # Test missing required field
-    response = requests.post(f"{BASE_URL}/honeypots", json={
+    response = session.post(f"{BASE_URL}/honeypots", json={
         "name": "No Port"
     })
     assert response.status_code == 400
     print("✅ Required field validation working")
     
     # Test invalid honeypot_id in logs
-    response = requests.post(f"{BASE_URL}/logs", json={
+    response = session.post(f"{BASE_URL}/logs", json={
         "honeypot_id": 99999,
         "ip_address": "1.2.3.4",
         "event_type": "test"
@@ -133,6 +227,9 @@ def main():
         test_health()
         honeypot_id = test_honeypots()
         test_logs(honeypot_id)
+        test_logs_bulk(honeypot_id)
+        test_logs_pagination(honeypot_id)
+        test_logs_unpaginated(honeypot_id)
         test_validation()
         
         print("=" * 40)
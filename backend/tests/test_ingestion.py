@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the log ingestion path (no running server or Docker needed):
+Docker stream de-framing, batched writer fallback, raw log flusher and ETag/304.
+"""
+import os
+import sys
+import shutil
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+# Banco e raw logs temporarios: precisam estar no ambiente antes de importar backend.app
+_TMP_DIR = tempfile.mkdtemp(prefix="beehive-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'beehive.db')}"
+os.environ["RAW_LOG_DIR"] = os.path.join(_TMP_DIR, "raw_logs")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend import log_manager, log_monitor
+from backend.app import app, db, Honeypot, Log
+
+
+def setUpModule():
+    with app.app_context():
+        db.create_all()
+
+
+def tearDownModule():
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+
+def frame(payload, stream_type=1):
+    """Frame do Docker sem TTY: 1 byte stream, 3 de padding, 4 de tamanho (big-endian), payload."""
+    return bytes([stream_type, 0, 0, 0]) + len(payload).to_bytes(4, "big") + payload
+
+
+def create_honeypot(port):
+    with app.app_context():
+        honeypot = Honeypot(name=f"hp-{port}", type="ssh", port=port, status="active")
+        db.session.add(honeypot)
+        db.session.commit()
+        return honeypot.id
+
+
+class LogStreamTests(unittest.TestCase):
+    def test_lines_across_split_reads(self):
+        """Header and payload split at arbitrary points still yield whole lines"""
+        stream = log_monitor._LogStream("cid", 1, None)
+        data = frame(b'{"a":1}\n{"b"') + frame(b':2}\n') + frame(b"tail\n", stream_type=2)
+        lines = []
+        for i in range(0, len(data), 3):
+            lines.extend(stream.feed(data[i:i + 3]))
+        self.assertEqual(lines, [b'{"a":1}', b'{"b":2}', b"tail"])
+        self.assertEqual(bytes(stream.partial), b"")
+        self.assertEqual(bytes(stream.frames), b"")
+
+    def test_incomplete_frame_waits_for_more_bytes(self):
+        stream = log_monitor._LogStream("cid", 1, None)
+        data = frame(b"line\n")
+        self.assertEqual(stream.feed(data[:7]), [])
+        self.assertEqual(stream.feed(data[7:-1]), [])
+        self.assertEqual(stream.feed(data[-1:]), [b"line"])
+
+    def test_eof_saves_trailing_partial_line(self):
+        """A last line without newline is saved before the stream is closed"""
+        reader, writer = socket.socketpair()
+        stream = log_monitor._LogStream("cid", 7, reader)
+        writer.sendall(frame(b'{"eventid":"x"}\n{"eventid":') + frame(b'"y"}'))
+        writer.close()
+        calls = []
+        with mock.patch.object(log_monitor, "parse_and_save_log", lambda line, hp: calls.append((line, hp))), \
+                mock.patch.object(log_monitor, "_close_stream", lambda stream, reason="": calls.append("closed")):
+            log_monitor._read_stream(stream)
+            log_monitor._read_stream(stream)
+        reader.close()
+        self.assertEqual(calls, [(b'{"eventid":"x"}', 7), (b'{"eventid":"y"}', 7), "closed"])
+
+    def test_parse_falls_back_on_bad_fields(self):
+        rows = []
+        with mock.patch.object(log_monitor, "enqueue_log_row", rows.append):
+            for line in (b'{"eventid":null,"src_ip":"bad"}', b'{"eventid":3}', b"[1]",
+                         b'{"eventid":"cowrie.login.failed","src_ip":"10.0.0.1"}'):
+                log_monitor.parse_and_save_log(line, 1)
+        self.assertEqual(
+            [(row["event_type"], row["ip_address"]) for row in rows],
+            [("generic_event", "0.0.0.0"), ("generic_event", "0.0.0.0"),
+             ("raw_output", "0.0.0.0"), ("cowrie.login.failed", "10.0.0.1")],
+        )
+
+
+class WriterTests(unittest.TestCase):
+    def setUp(self):
+        self.honeypot_id = create_honeypot(4100)
+
+    def count_logs(self, event_type):
+        with app.app_context():
+            return db.session.query(Log).filter(Log.event_type == event_type).count()
+
+    def test_batch_insert(self):
+        rows = [{"honeypot_id": self.honeypot_id, "ip_address": f"10.2.0.{i}", "event_type": "batch_ok",
+                 "details": ""} for i in range(5)]
+        log_manager.write_rows(rows)
+        self.assertEqual(self.count_logs("batch_ok"), 5)
+
+    def test_bad_row_falls_back_row_by_row(self):
+        """One row rejected by the FK sends only that row to the raw log"""
+        good = [{"honeypot_id": self.honeypot_id, "ip_address": f"10.3.0.{i}", "event_type": "batch_fallback",
+                 "details": ""} for i in range(3)]
+        bad = {"honeypot_id": 999999, "ip_address": "10.3.0.99", "event_type": "batch_fallback", "details": ""}
+        saved = []
+        with mock.patch.object(log_manager, "save_raw_log", saved.append):
+            log_manager.write_rows(good[:2] + [bad] + good[2:])
+        self.assertEqual(self.count_logs("batch_fallback"), 3)
+        self.assertEqual(saved, [bad])
+
+
+class RawLogTests(unittest.TestCase):
+    def test_flush_writes_buffered_lines(self):
+        path = log_manager.save_raw_log({"marker": "raw-flush-test"})
+        log_manager.save_raw_log({"marker": "raw-flush-test-2"})
+        log_manager.flush_raw_log()
+        with open(path, encoding="utf-8") as fh:
+            content = fh.read()
+        self.assertIn('"raw-flush-test"', content)
+        self.assertIn('"raw-flush-test-2"', content)
+        self.assertEqual(len(log_manager._raw_buffer), 0)
+
+
+class ConditionalGetTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.honeypot_id = create_honeypot(4099)
+        rows = [{"honeypot_id": cls.honeypot_id, "ip_address": "10.4.0.1", "event_type": "etag_test",
+                 "details": "x" * 400} for _ in range(6)]
+        log_manager.write_rows(rows)
+        cls.url = f"/api/logs/?honeypot_id={cls.honeypot_id}&limit=4"
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def test_304_keeps_next_cursor(self):
+        first = self.get(**{"Accept-Encoding": "identity"})
+        self.assertEqual(first.status_code, 200)
+        cursor = first.headers["X-Next-Cursor"]
+        etag = first.headers["ETag"]
+        self.assertNotIn(":", etag)
+
+        revalidated = self.get(**{"Accept-Encoding": "identity", "If-None-Match": etag})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.data, b"")
+        self.assertEqual(revalidated.headers["ETag"], etag)
+        self.assertEqual(revalidated.headers["X-Next-Cursor"], cursor)
+        self.assertIn("Accept-Encoding", revalidated.headers["Vary"])
+
+    def test_304_with_gzip_suffix(self):
+        first = self.get(**{"Accept-Encoding": "gzip"})
+        self.assertEqual(first.headers["Content-Encoding"], "gzip")
+        etag = first.headers["ETag"]
+        self.assertTrue(etag.endswith(':gzip"'))
+
+        revalidated = self.get(**{"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers["X-Next-Cursor"], first.headers["X-Next-Cursor"])
+
+    def test_suffix_for_unaccepted_encoding_is_not_a_match(self):
+        etag = self.get(**{"Accept-Encoding": "gzip"}).headers["ETag"]
+        response = self.get(**{"Accept-Encoding": "identity", "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data)
+
+    def test_changed_body_is_not_a_match(self):
+        response = self.get(**{"If-None-Match": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,21 +1,35 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
+
+try:
+    import polars as pl  # opcional: agregacao da pagina Conexoes em plano lazy multi-thread
+except ImportError:
+    pl = None
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
 from datetime import datetime
 import os
 
-MOCK_IPS = pd.DataFrame([
-    {"IP": "192.168.0.55", "Origem": "Brasil", "Ataque": "SSH Brute Force", "Honeypot": "Honeypot-SSH-01", "Data/Hora": "16/09/2025 14:32"},
-    {"IP": "10.10.10.45", "Origem": "EUA", "Ataque": "SQL Injection", "Honeypot": "Honeypot-HTTP-01", "Data/Hora": "16/09/2025 14:35"},
-    {"IP": "172.20.5.77", "Origem": "Rússia", "Ataque": "Port Scan", "Honeypot": "Honeypot-DB-01", "Data/Hora": "16/09/2025 14:40"}
-])
+# O script roda de novo a cada rerun: os DataFrames de exemplo sao montados uma vez por processo
+@st.cache_resource
+def _mock_frames():
+    ips = pd.DataFrame([
+        {"IP": "192.168.0.55", "Origem": "Brasil", "Ataque": "SSH Brute Force", "Honeypot": "Honeypot-SSH-01", "Data/Hora": "16/09/2025 14:32"},
+        {"IP": "10.10.10.45", "Origem": "EUA", "Ataque": "SQL Injection", "Honeypot": "Honeypot-HTTP-01", "Data/Hora": "16/09/2025 14:35"},
+        {"IP": "172.20.5.77", "Origem": "Rússia", "Ataque": "Port Scan", "Honeypot": "Honeypot-DB-01", "Data/Hora": "16/09/2025 14:40"}
+    ])
+    honeypots = pd.DataFrame([
+        {"id": 1, "name": "Honeypot-SSH-01", "type": "ssh", "status": "Online", "host": "0.0.0.0", "port": 22},
+        {"id": 2, "name": "Honeypot-HTTP-01", "type": "http", "status": "Offline", "host": "0.0.0.0", "port": 80},
+        {"id": 3, "name": "Honeypot-DB-01", "type": "mysql", "status": "Online", "host": "0.0.0.0", "port": 3306}
+    ])
+    return ips, honeypots
+
 
-MOCK_HONEYPOTS = pd.DataFrame([
-    {"id": 1, "name": "Honeypot-SSH-01", "type": "ssh", "status": "Online", "host": "0.0.0.0", "port": 22},
-    {"id": 2, "name": "Honeypot-HTTP-01", "type": "http", "status": "Offline", "host": "0.0.0.0", "port": 80},
-    {"id": 3, "name": "Honeypot-DB-01", "type": "mysql", "status": "Online", "host": "0.0.0.0", "port": 3306}
-])
+MOCK_IPS, MOCK_HONEYPOTS = _mock_frames()
 
 MOCK_LOGS = {
     "Honeypot-SSH-01": [
@@ -33,27 +47,219 @@ MOCK_LOGS = {
 # URL base da API (padrão configurável via variável de ambiente)
 DEFAULT_API_BASE = os.getenv("API_BASE_URL", "http://localhost:5000/api")
 
+# O script roda de novo a cada interacao; cache_resource mantem a sessao (keep-alive) entre os reruns
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    # Retry cobre conexao keep-alive derrubada pelo servidor; POST so repete se nem chegou a conectar
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.2))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_resource
+def _last_responses():
+    """url -> (etag, payload) da ultima resposta 200, para revalidar com If-None-Match."""
+    return {}
+
+
+# Reruns dentro da janela reaproveitam o payload; o botao "Atualizar dados" limpa antes do TTL
+FETCH_CACHE_TTL = 30
+
+
+@st.cache_data(ttl=FETCH_CACHE_TTL, show_spinner=False)
+def _get_json(url: str):
+    """GET condicional: 304 reaproveita o payload anterior. Erros nao entram no cache."""
+    last_responses = _last_responses()
+    headers = {}
+    previous = last_responses.get(url)
+    if previous is not None:
+        headers["If-None-Match"] = previous[0]
+    resp = get_session().get(url, headers=headers, timeout=4)
+    if resp.status_code == 304 and previous is not None:
+        return previous[1]
+    resp.raise_for_status()
+    payload = resp.json()
+    etag = resp.headers.get("ETag")
+    if etag:
+        last_responses[url] = (etag, payload)
+    return payload
+
+
 def fetch_honeypots(api_base: str):
     """Tenta obter a lista de honeypots da API. Retorna lista de dicts ou None."""
     try:
-        resp = requests.get(f"{api_base}/honeypots", timeout=4)
-        resp.raise_for_status()
-        return resp.json()
+        return _get_json(f"{api_base}/honeypots/")
     except RequestException as e:
         st.sidebar.warning(f"Não foi possível buscar honeypots da API: {e}")
         return None
 
 
+def logs_url(api_base: str) -> str:
+    return f"{api_base}/logs/?include=honeypot_name"
+
+
 def fetch_logs(api_base: str):
-    """Tenta obter os logs da API. Retorna lista de dicts ou None."""
+    """Logs ja com honeypot_name (JOIN na API), sem buscar /honeypots. Retorna lista de dicts ou None."""
     try:
-        resp = requests.get(f"{api_base}/logs", timeout=4)
-        resp.raise_for_status()
-        return resp.json()
+        return _get_json(logs_url(api_base))
     except RequestException as e:
         st.sidebar.warning(f"Não foi possível buscar logs da API: {e}")
         return None
 
+
+def logs_signature(api_base: str, logs_list) -> tuple:
+    """Chave barata dos logs para os builders em cache: o ETag da API (hash do corpo) ou, sem ele,
+    quantidade + ids do mais novo/mais antigo (a lista vem ordenada do mais recente)."""
+    etag = _last_responses().get(logs_url(api_base), (None,))[0]
+    if etag:
+        return (api_base, etag)
+    if not logs_list:
+        return (api_base, 0)
+    return (api_base, len(logs_list), logs_list[0].get('id'), logs_list[-1].get('id'))
+
+
+# Campos de cada log usados pela tabela da pagina Conexoes
+IPS_COLUMNS = ['ip_address', 'event_type', 'honeypot_name', 'details', 'timestamp']
+
+
+# DataFrames derivados ficam em cache_resource: devolvidos por referencia, sem copiar/serializar a cada
+# rerun como no cache_data. Quem recebe nao deve altera-los (st.dataframe so le).
+@st.cache_resource(ttl=FETCH_CACHE_TTL, max_entries=8, show_spinner=False)
+def build_ips_df(signature, _logs_list) -> pd.DataFrame:
+    """Tabela da pagina Conexoes (uma linha por IP); recalculada so quando `signature` muda.
+    O prefixo _ faz o Streamlit nao hashear a lista de logs."""
+    if pl is not None:
+        return _build_ips_df_polars(_logs_list)
+    # So as colunas usadas na agregacao; IP como categoria (chave de grupo menor e hash mais barato)
+    logs_df = pd.DataFrame(_logs_list, columns=IPS_COLUMNS)
+    logs_df['ip_address'] = logs_df['ip_address'].astype('category')
+    # Normaliza timestamps
+    logs_df['timestamp'] = pd.to_datetime(logs_df['timestamp'], format='ISO8601')
+
+    # Agrupa por IP e monta o DataFrame de exibição (agregacoes do pandas, sem loop por grupo)
+    def _join_sorted(s):
+        # pd.unique (hash em C) + np.sort, sem set/sorted em Python
+        return ', '.join(np.sort(pd.unique(s.dropna().to_numpy().astype(str))))
+
+    def _join_details(s):
+        return '; '.join(d for d in s.dropna().astype(str).unique() if d and d.lower() != 'none')
+
+    ips_df = logs_df.groupby('ip_address', sort=True, observed=True).agg(
+        Ataque=('event_type', _join_sorted),
+        Honeypot=('honeypot_name', _join_sorted),
+        Detalhes=('details', _join_details),
+        last_ts=('timestamp', 'max'),
+    ).reset_index().rename(columns={'ip_address': 'IP'})
+    ips_df['Origem'] = 'N/D'
+    ips_df['Ataque'] = ips_df['Ataque'].where(ips_df['Ataque'] != '', ips_df['Detalhes'].replace('', 'N/D'))
+    ips_df['Data/Hora'] = ips_df['last_ts'].dt.strftime('%d/%m/%Y %H:%M')
+    return ips_df
+
+
+def _build_ips_df_polars(logs_list) -> pd.DataFrame:
+    """Mesma tabela de build_ips_df com Polars; so vira pandas na entrega para o st.dataframe."""
+    details = pl.col('details')
+    ips = (
+        # schema: carrega so as colunas usadas, ja como texto (sem inferir tipos linha a linha)
+        pl.from_dicts(logs_list, schema={c: pl.Utf8 for c in IPS_COLUMNS})
+        .lazy()
+        .with_columns(pl.col('timestamp').str.to_datetime('%Y-%m-%dT%H:%M:%S%.f'))
+        .group_by('ip_address')
+        .agg(
+            pl.col('event_type').drop_nulls().unique().sort().str.join(', ').alias('Ataque'),
+            pl.col('honeypot_name').drop_nulls().unique().sort().str.join(', ').alias('Honeypot'),
+            details.filter((details != '') & (details.str.to_lowercase() != 'none'))
+            .unique(maintain_order=True).str.join('; ').alias('Detalhes'),
+            pl.col('timestamp').max().alias('last_ts'),
+        )
+        .with_columns(
+            pl.lit('N/D').alias('Origem'),
+            pl.when(pl.col('Ataque') != '').then(pl.col('Ataque'))
+            .when(pl.col('Detalhes') != '').then(pl.col('Detalhes'))
+            .otherwise(pl.lit('N/D')).alias('Ataque'),
+            pl.col('last_ts').dt.strftime('%d/%m/%Y %H:%M').alias('Data/Hora'),
+        )
+        .rename({'ip_address': 'IP'})
+        .sort('IP')
+        .collect()
+    )
+    return ips.to_pandas()
+
+
+@st.cache_resource(ttl=FETCH_CACHE_TTL, max_entries=8, show_spinner=False)
+def build_honeypots_df(honeypots_list) -> pd.DataFrame:
+    """Tabela da pagina Honeypots com created_at ja formatado."""
+    hp_df = pd.DataFrame(honeypots_list)
+    if 'created_at' in hp_df.columns:
+        hp_df['created_at'] = pd.to_datetime(hp_df['created_at'], format='ISO8601').dt.strftime('%d/%m/%Y %H:%M')
+    display_cols = [c for c in ['id', 'name', 'type', 'host', 'port', 'status', 'created_at'] if c in hp_df.columns]
+    return hp_df[display_cols]
+
+
+def decorate_log_lines(lines: pd.Series) -> pd.Series:
+    """Marca cada linha pela categoria (SQLi > brute force > scan) com str.contains vetorizado."""
+    lines = lines.astype(object)
+    low = lines.str.lower()
+    is_sql = low.str.contains("sql|injection", regex=True)
+    is_brute = ~is_sql & low.str.contains("brute force|login", regex=True)
+    is_scan = ~is_sql & ~is_brute & low.str.contains("scan", regex=False)
+    sql_lines = lines.str.replace("SQL Injection", "SQL Injection 🚨", regex=False).str.replace("bloqueado", "bloqueado 🔒", regex=False)
+    out = lines.where(~is_sql, sql_lines)
+    out = out.where(~is_brute, out + " ⚠️")
+    return out.where(~is_scan, out + " 🔍")
+
+@st.cache_resource(ttl=FETCH_CACHE_TTL, max_entries=8, show_spinner=False)
+def build_log_items(signature, _logs_list):
+    """Linhas da pagina Logs agrupadas por honeypot: [(nome, [linha, ...]), ...] na ordem de chegada."""
+    if not _logs_list:
+        return []
+    # Um DataFrame so: timestamp parseado uma vez e linhas montadas sem loop em Python;
+    # honeypot_name ja vem da API (?include=honeypot_name)
+    df = pd.DataFrame(_logs_list)
+    ts = pd.to_datetime(df['timestamp'], format='ISO8601')
+    details = df['details'].fillna('').astype(str).str.strip()
+    display = '[' + ts.dt.strftime('%H:%M') + '] ' + details.where(details != '', df['event_type'])
+    # Marcadores aplicados numa passada so sobre todas as linhas, nao card a card
+    df['display'] = decorate_log_lines(display)
+    return [(name, group['display'].tolist()) for name, group in df.groupby('honeypot_name', sort=False)]
+
+# Widgets do formulario rodam so o fragmento: mudar tipo/nome/porta nao reexecuta o script inteiro
+@st.fragment
+def create_node_form(api_base: str, use_api: bool):
+    if "new_vm" not in st.session_state:
+        st.session_state.new_vm = False
+    if not st.session_state.new_vm:
+        if st.button("Criar Nova Beehive Node com Honeypot"):
+            st.session_state.new_vm = True
+    if st.session_state.new_vm:
+        tipo_honeypot = st.selectbox("Selecione o tipo de Honeypot", ["SSH", "HTTP", "Telnet"])
+        nome_vm = st.text_input("Nome da Beehive Node", value=f"{tipo_honeypot}-node")
+        default_ports = {"SSH": 22, "HTTP": 80, "Telnet": 23}
+        port = st.number_input("Porta", min_value=1, max_value=65535, value=default_ports.get(tipo_honeypot, 22))
+        if st.button("Confirmar Criação"):
+            payload = {"name": nome_vm, "type": tipo_honeypot.lower(), "port": int(port)}
+            if use_api:
+                try:
+                    resp = get_session().post(f"{api_base}/honeypots/", json=payload, timeout=6)
+                    if resp.status_code in (200, 201, 202):
+                        created = resp.json()
+                        # 202: container ainda em provisionamento no backend
+                        st.success(f"Beehive Node {created.get('name', nome_vm)} com Honeypot {created.get('type', tipo_honeypot.lower())} criada com sucesso!")
+                        st.session_state.new_vm = False
+                        _get_json.clear()
+                        build_honeypots_df.clear()
+                        st.rerun()
+                    else:
+                        st.error(f"Erro ao criar honeypot: {resp.status_code} - {resp.text}")
+                except RequestException as e:
+                    st.error(f"Falha ao conectar na API: {e}")
+            else:
+                st.info("Modo offline: criação simulada.")
+                st.success(f"Beehive Node {nome_vm} com Honeypot {tipo_honeypot} (mock) criada!")
+                st.session_state.new_vm = False
+
 # ================================
 # Layout da Aplicação
 # ================================
@@ -64,42 +270,21 @@ st.sidebar.markdown("---")
 # Configuração da API (padrão pode ser alterado via variável de ambiente API_BASE_URL)
 api_base = st.sidebar.text_input("API Base URL", value=DEFAULT_API_BASE)
 use_api = st.sidebar.checkbox("Usar API (se disponível)", value=True)
+if st.sidebar.button("🔄 Atualizar dados"):
+    _get_json.clear()
+    build_ips_df.clear()
+    build_log_items.clear()
+    build_honeypots_df.clear()
 
 # Página: IPs Maliciosos
 if menu == "Conexoes":
     st.title("🚨 Conexoes Detectadas")
 
-    honeypots_list = fetch_honeypots(api_base) if use_api else None
     logs_list = fetch_logs(api_base) if use_api else None
 
-    if honeypots_list is not None and logs_list is not None and len(logs_list) > 0:
-        hp_df = pd.DataFrame(honeypots_list)
-        logs_df = pd.DataFrame(logs_list)
-
-        # Normaliza timestamps
-        logs_df['timestamp'] = pd.to_datetime(logs_df['timestamp'])
-
-        # Mapeia honeypot_id -> nome
-        hp_map = {hp['id']: hp.get('name') for hp in honeypots_list}
-        logs_df['honeypot_name'] = logs_df['honeypot_id'].map(lambda x: hp_map.get(x, f"Honeypot-{x}"))
-
-        # Agrupa por IP e monta o DataFrame de exibição
-        rows = []
-        for ip, group in logs_df.groupby('ip_address'):
-            attacks = ', '.join(sorted(set(group['event_type'].dropna().astype(str))))
-            honeypots_str = ', '.join(sorted(set(group['honeypot_name'].dropna().astype(str))))
-            details = '; '.join([d for d in group['details'].astype(str).unique() if d and d.lower() != 'none'])
-            last_ts = group['timestamp'].max()
-            rows.append({
-                'IP': ip,
-                'Origem': 'N/D',
-                'Ataque': attacks if attacks else (details or 'N/D'),
-                'Honeypot': honeypots_str,
-                'Data/Hora': last_ts.strftime('%d/%m/%Y %H:%M'),
-                'Detalhes': details
-            })
-
-        ips_df = pd.DataFrame(rows)
+    if logs_list is not None and len(logs_list) > 0:
+        ips_df = build_ips_df(logs_signature(api_base, logs_list), logs_list)
+
         if ips_df.empty:
             st.info("Nenhum IP registrado nos logs.")
         else:
@@ -112,21 +297,12 @@ if menu == "Conexoes":
 elif menu == "Logs":
     st.title("📜 Logs de Atividade por Honeypot")
 
-    honeypots_list = fetch_honeypots(api_base) if use_api else None
     logs_list = fetch_logs(api_base) if use_api else None
 
-    if honeypots_list is not None and logs_list is not None:
-        hp_map = {hp['id']: hp.get('name') for hp in honeypots_list}
-        hp_logs = {}
-        for log in logs_list:
-            hp_name = hp_map.get(log['honeypot_id'], f"Honeypot-{log['honeypot_id']}")
-            t = pd.to_datetime(log['timestamp'])
-            details = (log.get('details') or '').strip()
-            entry = f"[{t.strftime('%H:%M')}] {details or log.get('event_type')}"
-            hp_logs.setdefault(hp_name, []).append(entry)
-        hp_items = list(hp_logs.items())
+    if logs_list is not None:
+        hp_items = build_log_items(logs_signature(api_base, logs_list), logs_list)
     else:
-        hp_items = list(MOCK_LOGS.items())
+        hp_items = [(name, decorate_log_lines(pd.Series(lines)).tolist()) for name, lines in MOCK_LOGS.items()]
 
     cols_per_row = 2
 
@@ -138,18 +314,7 @@ elif menu == "Logs":
                 honeypot_name, entries = hp_items[idx]
                 with col:
                     st.subheader(f"🔹 {honeypot_name} ({len(entries)} eventos)")
-                    processed_lines = []
-                    for line in entries:
-                        l = line
-                        low = line.lower()
-                        if "sql" in low or "injection" in low:
-                            l = l.replace("SQL Injection", "SQL Injection 🚨").replace("bloqueado", "bloqueado 🔒")
-                        elif "brute force" in low or "login malicioso" in low or "login" in low:
-                            l = l + " ⚠️"
-                        elif "scanner" in low or "port scan" in low or "scan" in low:
-                            l = l + " 🔍"
-                        processed_lines.append(l)
-                    log_text = "  ".join(processed_lines) if len(processed_lines) == 1 else "\n".join(processed_lines)
+                    log_text = "  ".join(entries) if len(entries) == 1 else "\n".join(entries)
                     st.code(log_text, language="bash")
                     st.write("")
 
@@ -159,11 +324,7 @@ elif menu == "Honeypots":
 
     honeypots_list = fetch_honeypots(api_base) if use_api else None
     if honeypots_list is not None:
-        hp_df = pd.DataFrame(honeypots_list)
-        if 'created_at' in hp_df.columns:
-            hp_df['created_at'] = pd.to_datetime(hp_df['created_at']).dt.strftime('%d/%m/%Y %H:%M')
-        display_cols = [c for c in ['id', 'name', 'type', 'host', 'port', 'status', 'created_at'] if c in hp_df.columns]
-        st.dataframe(hp_df[display_cols], width='stretch')
+        st.dataframe(build_honeypots_df(honeypots_list), width='stretch')
     else:
         st.warning("API indisponível — exibindo honeypots de exemplo (mock).")
         st.dataframe(MOCK_HONEYPOTS, width='stretch')
@@ -171,32 +332,4 @@ elif menu == "Honeypots":
 # Página: Criar VM com Honeypot
 elif menu == "Criar Beehive Node com Honeypot":
     st.title("🆕 Criar Nova Beehive Node com Honeypot")
-    if "new_vm" not in st.session_state:
-        st.session_state.new_vm = False
-    if not st.session_state.new_vm:
-        if st.button("Criar Nova Beehive Node com Honeypot"):
-            st.session_state.new_vm = True
-    if st.session_state.new_vm:
-        tipo_honeypot = st.selectbox("Selecione o tipo de Honeypot", ["SSH", "HTTP", "Telnet"])
-        nome_vm = st.text_input("Nome da Beehive Node", value=f"{tipo_honeypot}-node")
-        default_ports = {"SSH": 22, "HTTP": 80, "Telnet": 23}
-        port = st.number_input("Porta", min_value=1, max_value=65535, value=default_ports.get(tipo_honeypot, 22))
-        if st.button("Confirmar Criação"):
-            payload = {"name": nome_vm, "type": tipo_honeypot.lower(), "port": int(port)}
-            if use_api:
-                try:
-                    resp = requests.post(f"{api_base}/honeypots", json=payload, timeout=6)
-                    if resp.status_code in (200, 201):
-                        created = resp.json()
-                        st.success(f"Beehive Node {created.get('name', nome_vm)} com Honeypot {created.get('type', tipo_honeypot.lower())} criada com sucesso!")
-                        st.session_state.new_vm = False
-                        st.rerun()
-                    else:
-                        st.error(f"Erro ao criar honeypot: {resp.status_code} - {resp.text}")
-                except RequestException as e:
-                    st.error(f"Falha ao conectar na API: {e}")
-            else:
-                st.info("Modo offline: criação simulada.")
-                st.success(f"Beehive Node {nome_vm} com Honeypot {tipo_honeypot} (mock) criada!")
-                st.session_state.new_vm = False
-
+    create_node_form(api_base, use_api)
@@ -4,7 +4,7 @@ set -euo pipefail
 cd "$(dirname "$0")"
 
 VENV_PATH=".venv"
-BACKEND="backend/app.py"
+BACKEND="backend/__main__.py"
 FRONTEND="front/st.py"
 STREAMLIT_PORT=8501
 
@@ -27,7 +27,7 @@ _cleanup() {
 trap _cleanup INT TERM EXIT
 
 echo "Iniciando Flask (backend/$BACKEND)..."
-python -m backend.app &
+python -m backend &
 FLASK_PID=$!
 echo "   Flask PID = $FLASK_PID"
 sleep 1